@@ -46,7 +46,9 @@ This project uses a virtual environment to manage dependencies.
     ```bash
     pip install -r requirements.txt
     ```
-    This will install `essentia`, `pyrubberband`, `pydub`, and `rich`.
+    This will install `essentia`, `soundfile`, `lameenc`, `pedalboard`, and
+    `rich`. Tempo changes run in-process through pedalboard's Rubber Band
+    build, falling back to librubberband or the `rubberband` command-line tool.
 
 **Usage:**
 
@@ -57,33 +59,152 @@ python bpm_master.py /path/to/your/audio --target-bpm 120
 
 import sys
 import argparse
+import contextlib
+import ctypes
+import ctypes.util
+import hashlib
+import itertools
 import logging
+import math
+import os
+import shutil
+import signal
+import sqlite3
+import subprocess
+import tempfile
 from pathlib import Path
-import multiprocessing, threading, time
-from multiprocessing import Manager
+import multiprocessing, threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+# Parallelism is across files, one per worker. Keep OpenMP/BLAS pools inside
+# the numeric libraries to one thread so N workers do not start N x cores threads.
+# Must be set before NumPy and friends are imported; user overrides still win.
+for _thread_env in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMBA_NUM_THREADS"):
+    os.environ.setdefault(_thread_env, "1")
 
 try:
     import essentia
     essentia.log.infoActive = False
     import essentia.standard as es
-    import pyrubberband as pyrb
+    import essentia.streaming as ess
+    import numpy as np
+    import soundfile as sf
+    import lameenc
     from rich.console import Console
     from rich.console import Console, Group
     from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn, MofNCompleteColumn
     from rich.live import Live
     from rich.panel import Panel
     from rich.text import Text
-    from pydub import AudioSegment
 
 except ImportError as e:
     print(f"Error: A required library is not installed. {e}", file=sys.stderr)
     print("Please install dependencies by running: pip install -r requirements.txt", file=sys.stderr)
     sys.exit(1)
 
+# Optional: Numba fuses the float -> int16 conversion into a single pass
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Optional: psutil tells physical cores from SMT siblings and reports free RAM
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Optional: librosa's single-onset beat tracker, selectable with --bpm-method.
+# librosa loads its submodules lazily, so importing it here is cheap.
+try:
+    import librosa
+except ImportError:
+    librosa = None
+
+# Optional: pedalboard ships a RubberBand build linked against a fast FFT
+# backend, so stretching runs in-process without a system librubberband
+try:
+    import pedalboard
+except ImportError:
+    pedalboard = None
+
 
 # --- Constants ---
-SUPPORTED_EXTENSIONS = ['.mp3', '.wav', '.flac']
+SUPPORTED_EXTENSIONS = frozenset({'.mp3', '.wav', '.flac'})
+# Every upper/lower-case spelling of the extensions, for a single C-level str.endswith()
+AUDIO_SUFFIXES = tuple(sorted({
+    "".join(chars)
+    for ext in SUPPORTED_EXTENSIONS
+    for chars in itertools.product(*[(c.lower(), c.upper()) for c in ext])
+}))
 LOG_FILE = 'errors.log'
+LIVE_LOG_LINES = 15
+MP3_BIT_RATE = 192
+# LAME algorithm quality (0 best/slowest .. 9 worst/fastest). 5 encodes about
+# twice as fast as 2 at the same bit rate, with no audible difference at 192 kbps.
+MP3_ENCODER_QUALITY = 5
+# One cache per user, so results are shared across working directories
+BPM_CACHE_FILE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "bpmmaster", "bpm_cache.sqlite"
+)
+# Bytes hashed from the start of each file for its cache identity
+BPM_CACHE_HASH_BYTES = 64 * 1024
+# BPM estimators selectable with --bpm-method. RhythmExtractor2013's single-onset
+# "degara" (the default) is the fastest and "multifeature" (five onset detectors)
+# the slowest. "librosa" uses librosa's beat tracker on a 22.05 kHz mono signal (optional).
+DEFAULT_BPM_METHOD = "degara"
+BPM_METHODS = ("degara", "percival", "multifeature", "librosa")
+# Cache tag per method. Bump when detection changes so stale cached BPMs are not reused
+BPM_ALGORITHMS = {
+    "percival": "percival-v2",
+    "degara": "degara-v2",
+    "multifeature": "multifeature-v2",
+    "librosa": "librosa-v2",
+}
+# RhythmExtractor2013's default maxTempo. Octave correction never goes above 200,
+# so higher estimates are not tempos (e.g. its result on digital silence)
+MAX_BPM = 208
+# RhythmExtractor2013 has no sampleRate parameter and assumes 44.1 kHz input
+RHYTHM_EXTRACTOR_SAMPLE_RATE = 44100
+# librosa's onset envelope is computed at this rate; its BPM range needs no more
+LIBROSA_SAMPLE_RATE = 22050
+RUBBERBAND_BLOCK_SIZE = 65536
+STATUS_NAME_SIZE = 256
+# Memory budgeted per worker (decode plus stretch of a long track) when sizing --jobs
+WORKER_MEMORY_BUDGET = 512 * 1024 * 1024
+# Upper bound on files per worker dispatch, so progress still updates regularly
+MAX_BATCH_SIZE = 16
+
+# Worker status codes, published through shared memory
+STATUS_IDLE, STATUS_DETECTING, STATUS_STRETCHING, STATUS_COPYING = 0, 1, 2, 3
+STATUS_MESSAGES = {
+    STATUS_IDLE: "Idle",
+    STATUS_DETECTING: "Detecting BPM for [bold]{}[/bold]",
+    STATUS_STRETCHING: "Stretching [bold]{}[/bold]",
+    STATUS_COPYING: "Copying [bold]{}[/bold]",
+}
+
+# RubberBand C API options (see rubberband-c.h)
+_RB_OPTION_PROCESS_OFFLINE = 0x00000000
+_RB_OPTION_THREADING_NEVER = 0x00010000
+_RB_OPTION_PHASE_INDEPENDENT = 0x00002000
+_RB_OPTION_ENGINE_FINER = 0x20000000
+
+# Stretcher settings per --quality. "fast" is the R2 engine with crisp
+# transients and no cross-bin phase locking; "high" is the R3 engine.
+STRETCH_QUALITIES = ("fast", "high")
+_PEDALBOARD_QUALITY_KWARGS = {
+    "fast": dict(high_quality=False, transient_mode="crisp", retain_phase_continuity=False, use_long_fft_window=False),
+    "high": dict(high_quality=True),
+}
+_RB_QUALITY_OPTIONS = {
+    "fast": _RB_OPTION_PHASE_INDEPENDENT,
+    "high": _RB_OPTION_ENGINE_FINER,
+}
+_RB_CLI_QUALITY_FLAGS = {
+    "fast": ["--crisp", "6"],
+    "high": ["--fine"],
+}
 
 # --- Rich Console ---
 console = Console()
@@ -96,109 +217,670 @@ logging.basicConfig(
     filemode='w'
 )
 
-def detect_bpm(file_path: str) -> float | None:
+def _prefetch(file_path: str):
+    """
+    Asks the kernel to start reading the whole file into the page cache, so
+    the decoder finds it there. Only the page cache is shared with the decoder:
+    POSIX_FADV_SEQUENTIAL would apply to this descriptor alone, so it is not used.
+    No-op where posix_fadvise is unavailable (Windows, macOS).
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+def load_audio(file_path: str) -> tuple[np.ndarray, int]:
+    """
+    Decodes an audio file once with Essentia, returning the float32 buffer
+    at its native sample rate so that BPM detection and stretching can share it.
+    """
+    _prefetch(file_path)
+    loader = _get_audio_loader()
+    loader.configure(filename=file_path)
+    audio, sr_float, _, _, _, _ = loader()
+    return audio, int(sr_float)
+
+# --- Per-worker state ---
+# Workers are processes by default or threads with --threads; either way each
+# one keeps its own Essentia algorithms, cache connection and status slot here.
+_worker = threading.local()
+_status_codes = None
+_status_names = None
+# Set by the parent on Ctrl+C so batches already running stop after their current file
+_stop_flag = None
+
+def _init_worker(status_codes, status_names, slot_counter, stop_flag, job_settings):
+    """
+    Runs once in each worker so Essentia's algorithm construction (FFT plans,
+    internal buffers) is paid per worker rather than per file.
+    Also claims this worker's slot in the shared status arrays and keeps the
+    run-wide `job_settings`, so tasks only need to carry the file paths.
+    """
+    global _status_codes, _status_names, _stop_flag
+    # Ctrl+C is handled by the parent, which cancels the queued batches; a worker
+    # process would otherwise fail its current batch and move on to the next.
+    if multiprocessing.parent_process() is not None:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    with slot_counter.get_lock():
+        _worker.slot = slot_counter.value % len(status_codes)
+        slot_counter.value += 1
+    _status_codes, _status_names = status_codes, status_names
+    _stop_flag = stop_flag
+    _worker.job_settings = job_settings
+
+    # BPM estimators keyed by (method, sample rate)
+    _worker.bpm_estimators = {}
+    # Resamplers to RhythmExtractor2013's fixed rate, keyed by source sample rate
+    _worker.resamplers = {}
+    # Streaming EasyLoader -> estimator networks keyed by method, reconfigured for each file
+    _worker.bpm_networks = {}
+    # AudioLoader reconfigured with each file's name instead of rebuilt per file
+    _worker.audio_loader = None
+    _worker.bpm_cache = _open_bpm_cache()
+    # Build the detector this run will actually use: --analyze-only streams
+    # through the network, otherwise the standard-mode estimator is used.
+    # librosa has nothing to prebuild.
+    bpm_method = job_settings["bpm_method"]
+    if bpm_method != "librosa":
+        if job_settings["analyze_only"]:
+            _get_bpm_network(bpm_method)
+        else:
+            _get_bpm_estimator(bpm_method, 44100)
+
+def _set_status(code: int, file_name: str = ""):
+    """Publishes this worker's current activity as plain stores into shared memory."""
+    offset = _worker.slot * STATUS_NAME_SIZE
+    name = file_name.encode("utf-8")[:STATUS_NAME_SIZE - 1]
+    _status_names[offset:offset + STATUS_NAME_SIZE] = name.ljust(STATUS_NAME_SIZE, b"\0")
+    _status_codes[_worker.slot] = code
+
+def _get_bpm_estimator(method: str, sr: int):
+    """Returns this worker's BPM estimator for `method` at `sr`, creating it on first use."""
+    estimator = _worker.bpm_estimators.get((method, sr))
+    if estimator is None:
+        if method == "percival":
+            estimator = es.PercivalBpmEstimator(sampleRate=sr)
+        else:
+            estimator = es.RhythmExtractor2013(method=method)
+        _worker.bpm_estimators[(method, sr)] = estimator
+    return estimator
+
+def _get_resampler(sr: int):
+    """
+    Returns this worker's Resample from `sr` to RhythmExtractor2013's rate, at
+    the fast linear quality: tempo detection does not need a band-limited resample.
+    """
+    resampler = _worker.resamplers.get(sr)
+    if resampler is None:
+        resampler = _worker.resamplers[sr] = es.Resample(
+            inputSampleRate=sr, outputSampleRate=RHYTHM_EXTRACTOR_SAMPLE_RATE, quality=4
+        )
+    return resampler
+
+def _get_audio_loader():
+    """
+    Returns this worker's AudioLoader, creating it on first use. It must outlive
+    each file: destroying a standard-mode loader makes every later composite
+    estimator call log "No network created, or last created network has been
+    deleted".
+    """
+    loader = getattr(_worker, "audio_loader", None)
+    if loader is None:
+        loader = _worker.audio_loader = es.AudioLoader()
+    return loader
+
+def _get_bpm_network(method: str):
+    """
+    Returns this worker's streaming BPM network for `method` as (loader, pool),
+    wiring it on first use. The loader is reconfigured per file, so the graph
+    is built once.
+    """
+    network = _worker.bpm_networks.get(method)
+    if network is None:
+        loader = ess.EasyLoader()
+        pool = essentia.Pool()
+        if method == "percival":
+            estimator = ess.PercivalBpmEstimator()
+        else:
+            estimator = ess.RhythmExtractor2013(method=method)
+            # Only the BPM is used; the other outputs must still be connected
+            estimator.ticks >> None
+            estimator.confidence >> None
+            estimator.estimates >> None
+            estimator.bpmIntervals >> None
+        loader.audio >> estimator.signal
+        estimator.bpm >> (pool, 'bpm')
+        network = _worker.bpm_networks[method] = (loader, pool)
+    return network
+
+def _correct_bpm(bpm: float) -> float:
+    """
+    Applies the post-processing heuristics for dance music to a raw estimate.
+    """
+    # 3. Check for octave errors (e.g., 75 BPM instead of 150) by doubling
+    # up to the 100 BPM floor in one step. Zero or NaN is left untouched
+    # (it used to loop forever) and is reported by the caller, as is an
+    # estimate above MAX_BPM, which becomes 0.
+    if bpm > MAX_BPM:
+        return 0.0
+    if 0 < bpm < 100:
+        bpm *= 2 ** math.ceil(math.log2(100.0 / bpm))
+
+    # 4. Round to the nearest whole number for a cleaner BPM value
+    bpm = round(bpm)
+
+    return float(bpm)
+
+def _downmix(audio: np.ndarray) -> np.ndarray:
+    """
+    Averages the channels of a (samples, channels) buffer into a contiguous
+    float32 mono array. Adding the columns runs as one contiguous vector loop,
+    unlike mean(axis=1), which reduces each two-sample row separately.
+    """
+    if audio.ndim == 1:
+        return audio
+    mono = np.add(audio[:, 0], audio[:, 1]) if audio.shape[1] == 2 else audio.sum(axis=1)
+    mono *= 1.0 / audio.shape[1]
+    return np.ascontiguousarray(mono, dtype=np.float32)
+
+def _librosa_bpm(mono: np.ndarray, sr: int) -> float:
+    """Estimates the tempo of a mono buffer with librosa's beat tracker at LIBROSA_SAMPLE_RATE."""
+    if sr != LIBROSA_SAMPLE_RATE:
+        mono = librosa.resample(mono, orig_sr=sr, target_sr=LIBROSA_SAMPLE_RATE, res_type="soxr_hq")
+    tempo, _ = librosa.beat.beat_track(y=mono, sr=LIBROSA_SAMPLE_RATE)
+    # Recent librosa versions return the tempo as a one-element array
+    return float(np.atleast_1d(tempo)[0])
+
+def detect_bpm(audio: np.ndarray, sr: int, file_path: str, method: str = DEFAULT_BPM_METHOD) -> float | None:
     """
-    Detects the BPM using the PercivalBpmEstimator algorithm from Essentia,
-    applying post-processing heuristics for dance music.
+    Detects the BPM with the Essentia (or librosa) estimator selected by
+    `method` (see BPM_METHODS), applying post-processing heuristics for dance music.
     """
     try:
-        # 1. Load the audio file in mono. PercivalBpmEstimator works on raw audio.
-        audio = es.MonoLoader(filename=file_path)()
+        # 1. Downmix to mono (RhythmExtractor2013 needs 44.1 kHz, so no 22.05 kHz path).
+        mono = _downmix(audio)
 
-        # 2. Use the PercivalBpmEstimator algorithm.
-        # This is another robust estimator recommended in the Essentia documentation.
-        bpm = es.PercivalBpmEstimator()(audio)
+        # 2. Use RhythmExtractor2013, or the PercivalBpmEstimator algorithm on request.
+        # These are the robust estimators recommended in the Essentia documentation.
+        # The instance is reused across files, so clear the previous file's state first.
+        if method == "percival":
+            # Analyzed at the native rate: its cost is in the onset-strength stage, so
+            # resampling only pays off if the onset resolution (and accuracy) drops too.
+            estimator = _get_bpm_estimator(method, sr)
+            estimator.reset()
+            bpm = estimator(mono)
+        elif method == "librosa":
+            bpm = _librosa_bpm(mono, sr)
+        else:
+            if sr != RHYTHM_EXTRACTOR_SAMPLE_RATE:
+                mono = _get_resampler(sr)(mono)
+            estimator = _get_bpm_estimator(method, RHYTHM_EXTRACTOR_SAMPLE_RATE)
+            estimator.reset()
+            bpm = estimator(mono)[0]
 
         # --- Post-processing Heuristics for Dance Music ---
+        return _correct_bpm(bpm)
+
+    except Exception as e:
+        logging.error(f"BPM detection ({method}) failed for {file_path}: {e}")
+        return None
+
+def detect_bpm_from_file(file_path: str, seconds: float, method: str = DEFAULT_BPM_METHOD) -> float | None:
+    """
+    Detects the BPM of the first `seconds` of a file (0 for the whole file)
+    with Essentia's streaming mode: the decoder feeds the `method` estimator
+    frame by frame, so the audio is never held in memory as a whole.
+    librosa has no streaming graph; it decodes just the window, at 22.05 kHz mono.
+    """
+    try:
+        if method == "librosa":
+            mono, sr = librosa.load(
+                file_path, sr=LIBROSA_SAMPLE_RATE, mono=True, res_type="soxr_hq", duration=seconds or None
+            )
+            return _correct_bpm(_librosa_bpm(mono, sr))
 
-        # 3. Check for octave errors (e.g., 75 BPM instead of 150)
-        while bpm < 100:
-            bpm *= 2
-        
-        # 4. Round to the nearest whole number for a cleaner BPM value
-        bpm = round(bpm)
-        
-        return float(bpm)
+        loader, pool = _get_bpm_network(method)
+        if seconds > 0:
+            loader.configure(filename=file_path, sampleRate=44100, endTime=seconds)
+        else:
+            loader.configure(filename=file_path, sampleRate=44100)
+        essentia.reset(loader)
+        pool.clear()
+        essentia.run(loader)
+
+        # --- Post-processing Heuristics for Dance Music ---
+        # Depending on the Essentia build the pool holds a scalar or a one-element
+        # vector for a streamed output; float() on an array with ndim > 0 is
+        # deprecated in NumPy, so flatten and take the final estimate either way.
+        return _correct_bpm(float(np.ravel(pool['bpm'])[-1]))
 
     except Exception as e:
-        logging.error(f"Essentia (PercivalBpmEstimator) failed for {file_path}: {e}")
+        logging.error(f"BPM detection ({method}) failed for {file_path}: {e}")
         return None
 
-def stretch_audio(input_file: str, output_file: str, factor: float):
+# --- BPM cache ---
+def _open_bpm_cache() -> sqlite3.Connection | None:
     """
-    Stretches audio tempo using pyrubberband and uses pydub for I/O.
+    Opens the on-disk BPM cache, creating it on first use. WAL mode lets
+    every worker read and write it concurrently. Returns None if it cannot be opened.
     """
-    # Essentia is still used for loading the audio
-    audio, sr_float, _, _, _, _ = es.AudioLoader(filename=input_file)()
-    sr = int(sr_float)
+    try:
+        os.makedirs(os.path.dirname(BPM_CACHE_FILE), exist_ok=True)
+        connection = sqlite3.connect(BPM_CACHE_FILE, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS bpm_cache "
+            "(file_key TEXT, algo TEXT, bpm REAL, PRIMARY KEY (file_key, algo))"
+        )
+        return connection
+    except (OSError, sqlite3.Error) as e:
+        logging.error(f"Could not open BPM cache {BPM_CACHE_FILE}: {e}")
+        return None
 
-    # Pyrubberband for stretching
-    stretched_audio = pyrb.time_stretch(audio, sr, factor)
+def _bpm_cache_key(file_path: str, file_stat: os.stat_result) -> str | None:
+    """
+    Identifies a file's contents by size, mtime and a BLAKE2b hash of its first
+    BPM_CACHE_HASH_BYTES, so cached BPMs survive renames and moved libraries.
+    Returns None if the file cannot be read or there is no cache to use it with.
+    """
+    if _worker.bpm_cache is None:
+        return None
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(BPM_CACHE_HASH_BYTES)
+    except OSError as e:
+        logging.error(f"Could not read {file_path} for the BPM cache: {e}")
+        return None
+    digest = hashlib.blake2b(head, digest_size=8).hexdigest()
+    return f"{file_stat.st_size}-{file_stat.st_mtime_ns}-{digest}"
 
-    # Convert numpy array to pydub AudioSegment
-    # The audio data needs to be in 16-bit integer format for pydub
-    if stretched_audio.ndim == 1:
-        channels = 1
+def _lookup_cached_bpm(file_path: str, cache_key: str | None, algo: str) -> float | None:
+    """Returns the cached BPM for an unchanged file, or None on a miss."""
+    if _worker.bpm_cache is None or cache_key is None:
+        return None
+    try:
+        row = _worker.bpm_cache.execute(
+            "SELECT bpm FROM bpm_cache WHERE file_key = ? AND algo = ?",
+            (cache_key, algo)
+        ).fetchone()
+    except sqlite3.Error as e:
+        logging.error(f"BPM cache lookup failed for {file_path}: {e}")
+        return None
+    return row[0] if row else None
+
+def _store_cached_bpm(file_path: str, cache_key: str | None, algo: str, bpm: float):
+    """Records a detected BPM so later runs can skip detection for this file."""
+    if _worker.bpm_cache is None or cache_key is None:
+        return
+    try:
+        with _worker.bpm_cache:
+            _worker.bpm_cache.execute(
+                "INSERT OR REPLACE INTO bpm_cache VALUES (?, ?, ?)",
+                (cache_key, algo, bpm)
+            )
+    except sqlite3.Error as e:
+        logging.error(f"BPM cache update failed for {file_path}: {e}")
+
+_librubberband = None
+
+def _load_librubberband():
+    """
+    Loads librubberband once per process and declares the C API signatures.
+    Returns None if the shared library is not available on this system.
+    """
+    global _librubberband
+    if _librubberband is None:
+        lib_name = ctypes.util.find_library("rubberband") or "librubberband.so.2"
+        try:
+            lib = ctypes.CDLL(lib_name)
+        except OSError:
+            _librubberband = False
+            return None
+
+        float_pp = ctypes.POINTER(ctypes.POINTER(ctypes.c_float))
+        lib.rubberband_new.restype = ctypes.c_void_p
+        lib.rubberband_new.argtypes = [ctypes.c_uint, ctypes.c_uint, ctypes.c_int, ctypes.c_double, ctypes.c_double]
+        lib.rubberband_delete.argtypes = [ctypes.c_void_p]
+        lib.rubberband_set_expected_input_duration.argtypes = [ctypes.c_void_p, ctypes.c_uint]
+        lib.rubberband_set_max_process_size.argtypes = [ctypes.c_void_p, ctypes.c_uint]
+        lib.rubberband_study.argtypes = [ctypes.c_void_p, float_pp, ctypes.c_uint, ctypes.c_int]
+        lib.rubberband_process.argtypes = [ctypes.c_void_p, float_pp, ctypes.c_uint, ctypes.c_int]
+        lib.rubberband_available.restype = ctypes.c_int
+        lib.rubberband_available.argtypes = [ctypes.c_void_p]
+        lib.rubberband_retrieve.restype = ctypes.c_uint
+        lib.rubberband_retrieve.argtypes = [ctypes.c_void_p, float_pp, ctypes.c_uint]
+        _librubberband = lib
+
+    return _librubberband or None
+
+def _channel_pointers(planar, offset: int):
+    """Builds a `float **` pointing at `offset` in each channel of a planar buffer."""
+    float_p = ctypes.POINTER(ctypes.c_float)
+    return (float_p * planar.shape[0])(*[row[offset:].ctypes.data_as(float_p) for row in planar])
+
+def _librubberband_time_stretch(lib, audio, sr: int, factor: float, quality: str):
+    """
+    Stretches a float32 buffer in-process through the librubberband C API,
+    mirroring the CLI's --tempo semantics (factor > 1 speeds the audio up).
+    """
+    planar = np.ascontiguousarray(np.atleast_2d(audio.T), dtype=np.float32)
+    channels, num_samples = planar.shape
+    output_blocks = []
+
+    def retrieve_available():
+        available = lib.rubberband_available(state)
+        while available > 0:
+            block = np.empty((channels, available), dtype=np.float32)
+            retrieved = lib.rubberband_retrieve(state, _channel_pointers(block, 0), available)
+            output_blocks.append(block[:, :retrieved])
+            available = lib.rubberband_available(state)
+
+    options = _RB_OPTION_PROCESS_OFFLINE | _RB_OPTION_THREADING_NEVER | _RB_QUALITY_OPTIONS[quality]
+    state = lib.rubberband_new(sr, channels, options, 1.0 / factor, 1.0)
+    try:
+        lib.rubberband_set_expected_input_duration(state, num_samples)
+        lib.rubberband_set_max_process_size(state, RUBBERBAND_BLOCK_SIZE)
+
+        # Offline mode requires a full study pass before processing.
+        for start in range(0, num_samples, RUBBERBAND_BLOCK_SIZE):
+            count = min(RUBBERBAND_BLOCK_SIZE, num_samples - start)
+            lib.rubberband_study(state, _channel_pointers(planar, start), count, int(start + count >= num_samples))
+
+        for start in range(0, num_samples, RUBBERBAND_BLOCK_SIZE):
+            count = min(RUBBERBAND_BLOCK_SIZE, num_samples - start)
+            lib.rubberband_process(state, _channel_pointers(planar, start), count, int(start + count >= num_samples))
+            retrieve_available()
+    finally:
+        lib.rubberband_delete(state)
+
+    stretched = np.concatenate(output_blocks, axis=1) if output_blocks else np.zeros((channels, 0), dtype=np.float32)
+    return stretched[0] if audio.ndim == 1 else stretched.T
+
+if njit is not None:
+    # Serial on purpose: files are already spread across one worker per core.
+    @njit(fastmath=True, cache=True)
+    def _float_to_int16_kernel(audio, out):
+        for i in range(audio.size):
+            value = audio[i] * 32767.0
+            if value < -32768.0:
+                value = -32768.0
+            elif value > 32767.0:
+                value = 32767.0
+            out[i] = np.int16(value)
+else:
+    _float_to_int16_kernel = None
+
+def _int16_buffer(shape: tuple) -> np.ndarray:
+    """
+    Returns an int16 array of `shape` backed by this worker's reusable buffer,
+    growing it only when a longer file comes along. Files are handed out
+    largest first, so it normally reaches full size on the first file.
+    """
+    size = math.prod(shape)
+    buffer = getattr(_worker, "int16_buffer", None)
+    if buffer is None or buffer.size < size:
+        buffer = _worker.int16_buffer = np.empty(size, dtype=np.int16)
+    return buffer[:size].reshape(shape)
+
+def _float_to_int16(audio: np.ndarray) -> np.ndarray:
+    """
+    Scales a float buffer in [-1, 1] to int16 in one pass when Numba is
+    available, clipping on overshoot instead of wrapping around.
+    Without Numba the float buffer is scaled in place, so callers must not
+    need it afterwards. The result is a view of a per-worker buffer that is
+    reused by the next call.
+    """
+    samples = _int16_buffer(audio.shape)
+    if _float_to_int16_kernel is not None:
+        _float_to_int16_kernel(np.ascontiguousarray(audio).reshape(-1), samples.reshape(-1))
     else:
-        channels = stretched_audio.shape[1]
+        # Multiply and clip with out= so no full-size float temporary is allocated
+        scaled = audio if audio.dtype.kind == "f" and audio.flags.writeable else audio.astype(np.float32)
+        np.multiply(scaled, 32767.0, out=scaled)
+        np.clip(scaled, -32768.0, 32767.0, out=scaled)
+        np.copyto(samples, scaled, casting="unsafe")
+    return samples
 
-    samples = (stretched_audio * 32767).astype("int16")
-    
-    audio_segment = AudioSegment(
-        samples.tobytes(),
-        frame_rate=sr,
-        sample_width=samples.dtype.itemsize,
-        channels=channels
-    )
+def _write_mp3(output_file: str, audio: np.ndarray, sr: int, channels: int):
+    """
+    Encodes a float buffer to MP3 in-process with lameenc (libmp3lame),
+    avoiding an ffmpeg subprocess per file.
+    """
+    # LAME takes interleaved 16-bit PCM; the stretched float buffer is not reused
+    samples = _float_to_int16(audio)
+
+    encoder = lameenc.Encoder()
+    encoder.set_bit_rate(MP3_BIT_RATE)
+    encoder.set_in_sample_rate(sr)
+    encoder.set_channels(channels)
+    encoder.set_quality(MP3_ENCODER_QUALITY)
+    # lameenc reads the int16 array through the buffer protocol, so no bytes copy is made
+    mp3_data = encoder.encode(samples) + encoder.flush()
+    Path(output_file).write_bytes(mp3_data)
+
+def _rubberband_cli_time_stretch(audio: np.ndarray, sr: int, factor: float, quality: str) -> np.ndarray:
+    """
+    Stretches the buffer with the rubberband command-line tool. Neither end can
+    be a pipe: offline rubberband reads its input twice (study pass, then a seek
+    back for the process pass), and libsndfile seeks back to finish the output
+    WAV header. Both sides therefore go through temporary files.
+    """
+    with tempfile.TemporaryDirectory(prefix="bpm_master_") as work_dir:
+        input_file = os.path.join(work_dir, "input.wav")
+        output_file = os.path.join(work_dir, "output.wav")
+        sf.write(input_file, audio, sr, subtype="FLOAT")
+        try:
+            subprocess.run(
+                ["rubberband", "-q", *_RB_CLI_QUALITY_FLAGS[quality], "--tempo", str(factor), input_file, output_file],
+                capture_output=True,
+                check=True,
+            )
+        except OSError as e:
+            raise RuntimeError(f"Failed to execute rubberband: {e}") from e
+        except subprocess.CalledProcessError as e:
+            stderr = e.stderr.decode("utf-8", "replace").strip()
+            raise RuntimeError(f"rubberband exited with status {e.returncode}: {stderr}") from e
+        stretched_audio, _ = sf.read(output_file, dtype="float32")
+    return stretched_audio
+
+
+def stretch_audio(audio: np.ndarray, sr: int, factor: float, quality: str = "fast") -> np.ndarray:
+    """
+    Stretches an already decoded buffer in-process with pedalboard or
+    librubberband, falling back to piping it through the rubberband CLI when
+    neither is available. Returns the stretched buffer; writing it is left to
+    `write_audio` so the caller can drop the input buffer first.
+    """
+    # Rubberband for stretching, without spawning the command-line tool if possible
+    if pedalboard is not None:
+        # pedalboard expects (channels, samples) and returns the same layout
+        stretched_audio = pedalboard.time_stretch(
+            np.ascontiguousarray(audio.T, dtype=np.float32), sr, stretch_factor=factor,
+            **_PEDALBOARD_QUALITY_KWARGS[quality]
+        ).T
+    elif (lib := _load_librubberband()) is not None:
+        stretched_audio = _librubberband_time_stretch(lib, audio, sr, factor, quality)
+    else:
+        stretched_audio = _rubberband_cli_time_stretch(audio, sr, factor, quality)
+    # pedalboard and librubberband hand back transposed (channel-major) views. Make
+    # the (frames, channels) layout contiguous once here, so the writers below
+    # never make their own hidden copies.
+    return np.ascontiguousarray(stretched_audio, dtype=np.float32)
+
+def write_audio(output_file: str, audio: np.ndarray, sr: int):
+    """
+    Writes a float buffer with libsndfile, or lameenc for MP3, picking the
+    format from the output file's extension.
+    """
+    if audio.ndim == 1:
+        channels = 1
+    else:
+        channels = audio.shape[1]
 
-    # Export with pydub
     output_format = Path(output_file).suffix[1:].lower()
-    audio_segment.export(output_file, format=output_format)
+    if output_format == "mp3":
+        _write_mp3(output_file, audio, sr, channels)
+    else:
+        # libsndfile quantizes the float buffer to 16-bit PCM in C. The subtype is
+        # pinned so the output does not depend on libsndfile's per-format default.
+        sf.write(output_file, audio, sr, format=output_format.upper(), subtype="PCM_16")
+
 
+def _within_tolerance(detected_bpm: float, target_bpm: float, tolerance: tuple[float, bool]) -> bool:
+    """
+    Checks whether a file is close enough to the target to be copied as is.
+    `tolerance` is (value, is_percent): an absolute BPM difference, or a
+    maximum deviation of the stretch factor from 1 in percent.
+    """
+    value, is_percent = tolerance
+    if is_percent:
+        return abs(target_bpm / detected_bpm - 1.0) * 100.0 <= value
+    return abs(detected_bpm - target_bpm) <= value
 
 def _process_single_file_task(args):
-    file_path, target_bpm, input_path_str, output_path_str, analyze_only, log_file_name, worker_id, status_dict = args
-    
-    input_path = Path(input_path_str)
-    output_path = Path(output_path_str)
-    file_name = Path(file_path).name
+    file_path, relative_path = args
+    settings = _worker.job_settings
+    target_bpm = settings["target_bpm"]
+    output_path_str = settings["output_path"]
+    analyze_only = settings["analyze_only"]
+    bpm_window = settings["bpm_window"]
+    bpm_method = settings["bpm_method"]
+    tolerance = settings["tolerance"]
+    quality = settings["quality"]
+
+    # Returned with every result, so the consumer loop does not rebuild a Path per file
+    file_name = os.path.basename(file_path)
 
     try:
-        status_dict[worker_id] = f"Detecting BPM for [bold]{file_name}[/bold]"
-        detected_bpm = detect_bpm(file_path)
+        _set_status(STATUS_DETECTING, file_name)
+
+        # Reuse the BPM from a previous run if the file has not changed
+        cache_key = _bpm_cache_key(file_path, os.stat(file_path))
+        cache_algo = f"{BPM_ALGORITHMS[bpm_method]}/{bpm_window:g}s"
+        detected_bpm = _lookup_cached_bpm(file_path, cache_key, cache_algo)
+        audio = None
+
+        if detected_bpm is None:
+            if analyze_only:
+                # Nothing will be stretched, so the BPM window is streamed from disk
+                detected_bpm = detect_bpm_from_file(file_path, bpm_window, bpm_method)
+            else:
+                try:
+                    audio, sr = load_audio(file_path)
+                except Exception as e:
+                    logging.error(f"Essentia (AudioLoader) failed for {file_path}: {e}")
+                    _set_status(STATUS_IDLE)
+                    return (False, file_path, file_name, "BPM_DETECTION_FAILED")
+
+                # The stretch keeps the full decode; BPM detection only sees the window
+                bpm_audio = audio[:int(bpm_window * sr)] if bpm_window > 0 else audio
+                detected_bpm = detect_bpm(bpm_audio, sr, file_path, bpm_method)
+                # The window is a view that would keep the whole decode alive
+                del bpm_audio
+
+            if detected_bpm is not None:
+                _store_cached_bpm(file_path, cache_key, cache_algo, detected_bpm)
 
         if detected_bpm is None:
-            status_dict[worker_id] = "Idle"
-            return (False, file_path, "BPM_DETECTION_FAILED")
+            _set_status(STATUS_IDLE)
+            return (False, file_path, file_name, "BPM_DETECTION_FAILED")
         elif analyze_only:
-            status_dict[worker_id] = "Idle"
-            return (True, file_path, "ANALYZE_ONLY", detected_bpm)
+            _set_status(STATUS_IDLE)
+            return (True, file_path, file_name, "ANALYZE_ONLY", detected_bpm)
         elif detected_bpm > 0:
             factor = target_bpm / detected_bpm
-            relative_path = Path(file_path).relative_to(input_path)
-            output_file_path = output_path / relative_path
-            output_file_path.parent.mkdir(parents=True, exist_ok=True)
+            output_file_path = Path(output_path_str) / relative_path
+
+            if _within_tolerance(detected_bpm, target_bpm, tolerance):
+                # Already at the target tempo: a plain copy replaces decode, DSP and encode.
+                # Not a hard link, so editing the output can never modify the original.
+                try:
+                    _set_status(STATUS_COPYING, file_name)
+                    shutil.copyfile(file_path, output_file_path)
+                    _set_status(STATUS_IDLE)
+                    return (True, file_path, file_name, "COPIED")
+                except Exception as e:
+                    logging.error(f"Failed to copy {file_path}: {e}")
+                    _set_status(STATUS_IDLE)
+                    return (False, file_path, file_name, "STRETCH_FAILED")
 
             try:
-                status_dict[worker_id] = f"Stretching [bold]{file_name}[/bold]"
-                stretch_audio(file_path, str(output_file_path), factor)
-                status_dict[worker_id] = "Idle"
-                return (True, file_path, "PROCESSED")
+                _set_status(STATUS_STRETCHING, file_name)
+                if audio is None:
+                    # The BPM came from the cache, so the file has not been decoded yet
+                    audio, sr = load_audio(file_path)
+                stretched_audio = stretch_audio(audio, sr, factor, quality)
+                # Drop the decode before encoding so it is not held alongside the stretch
+                audio = None
+                write_audio(str(output_file_path), stretched_audio, sr)
+                _set_status(STATUS_IDLE)
+                return (True, file_path, file_name, "PROCESSED")
             except Exception as e:
                 logging.error(f"Failed to stretch audio for {file_path}: {e}")
-                status_dict[worker_id] = "Idle"
-                return (False, file_path, "STRETCH_FAILED")
+                _set_status(STATUS_IDLE)
+                return (False, file_path, file_name, "STRETCH_FAILED")
         else:
             logging.error(f"Cannot process {file_path} due to invalid detected BPM (0).")
-            status_dict[worker_id] = "Idle"
-            return (False, file_path, "INVALID_BPM")
+            _set_status(STATUS_IDLE)
+            return (False, file_path, file_name, "INVALID_BPM")
 
     except Exception as e:
         logging.error(f"Unhandled error processing {file_path}: {e}")
-        status_dict[worker_id] = "Idle"
-        return (False, file_path, "UNHANDLED_ERROR")
+        _set_status(STATUS_IDLE)
+        return (False, file_path, file_name, "UNHANDLED_ERROR")
 
-def process_folder(folder: str, target_bpm: float, out_dir: str, analyze_only: bool):
+def _process_file_batch(batch):
+    """
+    Runs a batch of file tasks in one dispatch and returns their results in order.
+    The next file is read ahead into the page cache instead of decoded in a
+    thread: AudioLoader holds the GIL, so a decode thread would not overlap.
+    """
+    results = []
+    for i, args in enumerate(batch):
+        if _stop_flag.value:
+            break
+        if i + 1 < len(batch) and not _worker.job_settings["analyze_only"]:
+            _prefetch(batch[i + 1][0])
+        results.append(_process_single_file_task(args))
+    return results
+
+class _LiveLayout:
+    """
+    Renderable that calls `render` on every Live refresh, so the display is
+    rebuilt by Live's own refresh thread from the current shared state.
+    """
+    def __init__(self, render):
+        self.render = render
+
+    def __rich_console__(self, console, options):
+        yield self.render()
+
+def _iter_audio(root: str):
+    """
+    Recursively yields the paths of supported audio files under `root`.
+    The extension is checked on the raw entry name before anything is stat()ed.
+    Directories that cannot be read are skipped, as Path.rglob did.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(AUDIO_SUFFIXES) and entry.is_file():
+                        yield entry.path
+        except OSError as e:
+            logging.error(f"Cannot read directory {directory}: {e}")
+
+def process_folder(folder: str, target_bpm: float, out_dir: str, analyze_only: bool, bpm_window: float, bpm_method: str, tolerance: tuple[float, bool], quality: str, use_threads: bool, jobs: int):
     """
     Main function to process a folder of audio files with a Rich progress bar.
     """
@@ -207,22 +889,30 @@ def process_folder(folder: str, target_bpm: float, out_dir: str, analyze_only: b
     input_path = Path(folder).expanduser()
     output_path = Path(out_dir).expanduser()
     
-    audio_files = [
-        str(p) for p in input_path.rglob('*') 
-        if p.suffix.lower() in SUPPORTED_EXTENSIONS and p.is_file()
-    ]
+    audio_files = list(_iter_audio(str(input_path)))
 
     if not audio_files:
         console.print("[yellow]No audio files found. Exiting.[/yellow]")
         return
 
     console.print(f"Found {len(audio_files)} audio files.")
+
+    # Longest-processing-time first: start the biggest files early so no
+    # single long track is left running while the other workers sit idle.
+    audio_files.sort(key=os.path.getsize, reverse=True)
     
+    # Relative paths are worked out once here, not in every worker task
+    relative_paths = [str(Path(f).relative_to(input_path)) for f in audio_files]
+
     if not analyze_only:
-        output_path.mkdir(parents=True, exist_ok=True)
+        # Create each output directory once here rather than once per file in the workers
+        output_dirs = {(output_path / rel).parent for rel in relative_paths}
+        for output_dir in output_dirs:
+            output_dir.mkdir(parents=True, exist_ok=True)
 
     processed_count = 0
     modified_count = 0
+    copied_count = 0
     failed_count = 0
     log_messages = []
 
@@ -235,51 +925,117 @@ def process_folder(folder: str, target_bpm: float, out_dir: str, analyze_only: b
     )
     progress = Progress(*progress_columns, console=console)
 
-    num_cores = multiprocessing.cpu_count()
+    num_workers = jobs
     
-    with Manager() as manager:
-        status_dict = manager.dict()
-        for i in range(num_cores):
-            status_dict[i] = "Idle"
+    # Shared-memory status: one int code plus a fixed-size filename slot per worker
+    status_codes = multiprocessing.Array('i', num_workers, lock=False)
+    status_names = multiprocessing.Array(ctypes.c_char, num_workers * STATUS_NAME_SIZE, lock=False)
+    slot_counter = multiprocessing.Value('i', 0)
+    stop_flag = multiprocessing.Value('b', 0, lock=False)
 
-        def get_status_panel() -> Panel:
-            status_group = Group(*[Text.from_markup(f"Worker {i+1}: {status_dict[i]}") for i in range(num_cores)])
-            return Panel(status_group, title="Worker Status", border_style="blue")
+    def get_status_panel() -> Panel:
+        lines = []
+        for i in range(num_workers):
+            raw_name = status_names[i * STATUS_NAME_SIZE:(i + 1) * STATUS_NAME_SIZE]
+            name = raw_name.split(b"\0", 1)[0].decode("utf-8", "ignore")
+            lines.append(Text.from_markup(f"Worker {i+1}: " + STATUS_MESSAGES[status_codes[i]].format(name)))
+        status_group = Group(*lines)
+        return Panel(status_group, title="Worker Status", border_style="blue")
 
-        job_panel = Panel(Group(*[Text.from_markup(msg) for msg in log_messages]), title="Results", border_style="green", expand=True)
-        layout = Group(progress, get_status_panel(), job_panel)
+    def render_layout() -> Group:
+        # Runs on Live's refresh thread. Only the latest results are repainted;
+        # the full list is printed once when processing is done.
+        job_group = Group(*[Text.from_markup(msg) for msg in log_messages[-LIVE_LOG_LINES:]])
+        job_panel = Panel(job_group, title="Results", border_style="green", expand=True)
+        return Group(progress, get_status_panel(), job_panel)
 
-        with Live(layout, console=console, screen=False, redirect_stderr=False, vertical_overflow="visible") as live:
-            task = progress.add_task("[green]Process [/green]", total=len(audio_files))
+    # Settings shared by every file go to the workers once, through the initializer;
+    # each task only pickles its own paths.
+    job_settings = {
+        "target_bpm": target_bpm,
+        "output_path": str(output_path),
+        "analyze_only": analyze_only,
+        "bpm_window": bpm_window,
+        "bpm_method": bpm_method,
+        "tolerance": tolerance,
+        "quality": quality,
+    }
+    tasks_args = list(zip(audio_files, relative_paths))
 
-            tasks_args = [
-                (file, target_bpm, str(input_path), str(output_path), analyze_only, LOG_FILE, i % num_cores, status_dict)
-                for i, file in enumerate(audio_files)
+    if num_workers == 1:
+        # --jobs 1: everything runs in this process, which keeps debugging simple
+        _init_worker(status_codes, status_names, slot_counter, stop_flag, job_settings)
+        executor = contextlib.nullcontext()
+    elif use_threads:
+        executor = ThreadPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_worker,
+            initargs=(status_codes, status_names, slot_counter, stop_flag, job_settings)
+        )
+    else:
+        # On Linux, fork workers so they inherit the already imported Essentia and
+        # NumPy modules instead of re-importing them. macOS and Windows keep spawn,
+        # since forking is unsafe with the system frameworks there.
+        start_method = "fork" if sys.platform.startswith("linux") else "spawn"
+        executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(status_codes, status_names, slot_counter, stop_flag, job_settings)
+        )
+
+    # Work is submitted before Live starts its refresh thread, so the fork
+    # happens while this process is still single-threaded.
+    with executor:
+        if num_workers == 1:
+            # Lazy, so each file is processed as the loop below asks for its result
+            results = map(_process_single_file_task, tasks_args)
+        else:
+            # Files are dispatched in batches so large libraries are not dominated by
+            # one pickle/IPC round-trip per file. About four batches per worker, capped
+            # at MAX_BATCH_SIZE files, keeps the load balanced and the progress bar live.
+            batch_size = min(MAX_BATCH_SIZE, max(1, len(tasks_args) // (num_workers * 4)))
+            # Batches are strided over the largest-first list rather than cut from it
+            # in runs, so the biggest files are spread over the first batches (one per
+            # worker) instead of all landing in the first one.
+            num_batches = math.ceil(len(tasks_args) / batch_size)
+            futures = [
+                executor.submit(_process_file_batch, tasks_args[i::num_batches])
+                for i in range(num_batches)
             ]
+            results = (result for future in as_completed(futures) for result in future.result())
+        # Leaving the with block waits for the executor, so on Ctrl+C (or any
+        # error) drop the batches that have not started and stop the running ones
+        # after their current file, instead of running them all.
+        # The futures are cancelled here too: the process pool only cancels them
+        # later, in its manager thread, and the with block's own shutdown()
+        # clears the request before that thread sees it.
+        try:
+            with Live(
+                _LiveLayout(render_layout),
+                console=console,
+                screen=False,
+                redirect_stderr=False,
+                vertical_overflow="visible",
+                refresh_per_second=10,
+                auto_refresh=True,
+                transient=True
+            ):
+                task = progress.add_task("[green]Process [/green]", total=len(audio_files))
 
-            # --- Threaded updater for the live display ---
-            stop_event = threading.Event()
-            def updater():
-                while not stop_event.is_set():
-                    live.update(Group(progress, get_status_panel(), job_panel))
-                    time.sleep(0.1)
-            
-            updater_thread = threading.Thread(target=updater)
-            updater_thread.start()
-            # -----------------------------------------
-
-            with multiprocessing.Pool(processes=num_cores) as pool:
-                for result in pool.imap_unordered(_process_single_file_task, tasks_args):
-                    is_success, file_path, status_code, *extra_data = result
-                    file_name = Path(file_path).name
+                for result in results:
+                    is_success, file_path, file_name, status_code, *extra_data = result
 
                     if is_success:
                         if status_code == "ANALYZE_ONLY":
                             detected_bpm = extra_data[0]
                             log_messages.append(f"[blue] INFO [/blue] {file_name} | BPM: {detected_bpm:.2f}")
+                        # Successful stretches and copies are only counted; the
+                        # progress line shows the latest file instead of a log line.
                         elif status_code == "PROCESSED":
                             modified_count += 1
-                            log_messages.append(f"[green] OK   [/green] Processed {file_name}")
+                        elif status_code == "COPIED":
+                            copied_count += 1
                     else:
                         failed_count += 1
                         if status_code == "BPM_DETECTION_FAILED":
@@ -290,25 +1046,33 @@ def process_folder(folder: str, target_bpm: float, out_dir: str, analyze_only: b
                             log_messages.append(f"[red]  FAIL [/red] Invalid BPM (0) for {file_name}")
                         elif status_code == "UNHANDLED_ERROR":
                             log_messages.append(f"[red]  FAIL [/red] Unhandled error for {file_name} (see {LOG_FILE})")
-                    
+
                     processed_count += 1
-                    progress.update(task, advance=1)
-                    job_panel.renderable = Group(*[Text.from_markup(msg) for msg in log_messages])
-            
-            # Stop the updater thread
-            stop_event.set()
-            updater_thread.join()
-
-            # Final cleanup of the status panel
-            for i in range(num_cores):
-                status_dict[i] = "Idle"
-            live.update(Group(progress, get_status_panel(), job_panel))
+                    progress.update(task, advance=1, description=f"[green]Process [/green]{file_name}")
+        except BaseException:
+            if num_workers > 1:
+                stop_flag.value = 1
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    # --- Results, written once instead of repainted on every refresh ---
+    # Only BPMs (analyze-only) and failures are listed; successes are in the summary.
+    if log_messages:
+        console.print(Panel(
+            Group(*[Text.from_markup(msg) for msg in log_messages]),
+            title="Results",
+            border_style="green",
+            expand=True
+        ))
 
     # --- Final Summary ---
     summary_messages = []
     summary_messages.append(f"Total files processed: {processed_count}")
     if not analyze_only:
         summary_messages.append(f"Files modified:        {modified_count}")
+        summary_messages.append(f"Files copied:          {copied_count}")
     summary_messages.append(f"Files failed:          [red]{failed_count}[/red]")
     if failed_count > 0:
         summary_messages.append(f"See '{LOG_FILE}' for details on errors.")
@@ -322,6 +1086,27 @@ def process_folder(folder: str, target_bpm: float, out_dir: str, analyze_only: b
     console.print(summary_panel)
 
 
+def _default_jobs() -> int:
+    """
+    One worker per physical core, so SMT siblings do not compete for the same
+    FFT units and caches, further limited by free RAM at WORKER_MEMORY_BUDGET
+    per worker. Falls back to the logical CPU count without psutil.
+    """
+    if psutil is None:
+        return os.cpu_count() or 1
+    cores = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    memory_bound = psutil.virtual_memory().available // WORKER_MEMORY_BUDGET
+    return max(1, min(cores, memory_bound))
+
+def _parse_tolerance(text: str) -> tuple[float, bool]:
+    """Parses --tolerance as BPM ("0.5") or as a percentage ("2%")."""
+    is_percent = text.endswith("%")
+    try:
+        value = float(text[:-1] if is_percent else text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid tolerance: '{text}' (use e.g. 0.5 or 2%)")
+    return value, is_percent
+
 def main():
     """Main entry point and argument parsing."""
     parser = argparse.ArgumentParser(
@@ -348,6 +1133,50 @@ def main():
         action="store_true",
         help="If set, only analyze and list BPMs without modifying any files."
     )
+    parser.add_argument(
+        "--bpm-window",
+        type=float,
+        default=60.0,
+        help="Seconds from the start of each file used for BPM detection.\nUse 0 to analyze the whole file. (default: 60)"
+    )
+    parser.add_argument(
+        "--bpm-method",
+        choices=BPM_METHODS,
+        default=DEFAULT_BPM_METHOD,
+        help="BPM estimator. 'degara' and 'multifeature' use Essentia's RhythmExtractor2013\n"
+             "('degara' is the fastest, 'multifeature' the slowest); 'percival' uses\n"
+             "PercivalBpmEstimator; 'librosa' uses librosa's beat tracker\n"
+             "(pip install librosa). (default: degara)"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=_parse_tolerance,
+        default=(0.5, False),
+        help="Files whose detected BPM is within this many BPM of the target\n"
+             "are copied unchanged instead of stretched. A value such as '2%%'\n"
+             "instead allows that much change in tempo. (default: 0.5)"
+    )
+    parser.add_argument(
+        "--quality",
+        choices=STRETCH_QUALITIES,
+        default="fast",
+        help="Time-stretch quality. 'fast' uses Rubber Band's R2 engine with crisp\n"
+             "transients and no phase locking; 'high' uses the slower R3 engine. (default: fast)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of files processed in parallel. 1 runs everything in this\n"
+             "process. (default: physical cores, fewer if free RAM is short)"
+    )
+    parser.add_argument(
+        "--threads",
+        action="store_true",
+        help="Run workers as threads in this process instead of separate processes.\n"
+             "Avoids process start-up, but Essentia's BPM detection holds the GIL,\n"
+             "so this mostly pays off for small batches."
+    )
 
     if len(sys.argv) == 1:
         parser.print_help(sys.stderr)
@@ -364,11 +1193,33 @@ def main():
         console.print("[bold red]Error: Target BPM must be a positive number.[/bold red]")
         sys.exit(1)
 
+    if args.tolerance[0] < 0:
+        console.print("[bold red]Error: Tolerance cannot be negative.[/bold red]")
+        sys.exit(1)
+
+    if args.bpm_window < 0:
+        console.print("[bold red]Error: BPM window cannot be negative.[/bold red]")
+        sys.exit(1)
+
+    if args.bpm_method == "librosa" and librosa is None:
+        console.print("[bold red]Error: --bpm-method librosa needs librosa (pip install librosa).[/bold red]")
+        sys.exit(1)
+
+    if args.jobs is not None and args.jobs < 1:
+        console.print("[bold red]Error: Jobs must be at least 1.[/bold red]")
+        sys.exit(1)
+
     process_folder(
         folder=str(input_folder_path),
         target_bpm=args.target_bpm,
         out_dir=args.output_dir,
-        analyze_only=args.analyze_only
+        analyze_only=args.analyze_only,
+        bpm_window=args.bpm_window,
+        bpm_method=args.bpm_method,
+        tolerance=args.tolerance,
+        quality=args.quality,
+        use_threads=args.threads,
+        jobs=args.jobs or _default_jobs()
     )
 
 if __name__ == "__main__":